@@ -1,6 +1,7 @@
 import time
 
 try:
+	from onewire.bus import OneWireBus, crc8
 	from onewire.device import OneWireDevice
 	import onewire.constants as const
 
@@ -10,6 +11,7 @@ except (ImportError, ModuleNotFoundError):
 	print(f"[{__file__}] Appending '{import_path}' to sys.path")
 	sys.path.append(import_path)
 
+	from onewire.bus import OneWireBus, crc8
 	from onewire.device import OneWireDevice
 	import onewire.constants as const
 
@@ -28,6 +30,8 @@ DS18S20_FAMILY_CODE = 0x10
 RW_TIME = 0.010  			## EEPROM write time, default value
 # TRANSMIT_BITS = 0x40  	## 64-bits to transmit over the bus
 SCRATCH_RD_SIZE = 0x48  ## read in 72 bits from scratch reg
+TEMP_RD_SIZE = 0x10  	## read in only the 16 temperature bits (LSB, MSB) from scratch reg
+FULL_READ_INTERVAL = 10  ## In truncated mode, every Nth scratchpad read is a full, CRC-checked read
 
 
 RESOLUTION_VALUES = (9, 10, 11, 12)
@@ -74,7 +78,7 @@ PLUSMINUS = '±'
 
 class DS18X20:
 
-	def __init__(self, bus, address, resolution=12, target=29.999, flux=1.5):
+	def __init__(self, bus, address, resolution=12, target=29.999, flux=1.5, truncated=False, full_read_every=FULL_READ_INTERVAL):
 		# assert(isinstance(bus, onewire.bus.OneWireBus) and isinstance(address, onewire.bus.OneWireAddress))
 		
 		#if not (address.family_code == DS18B20_FAMILY_CODE or address.family_code == DS18S20_FAMILY_CODE):
@@ -88,6 +92,9 @@ class DS18X20:
 		self._temp_flux = flux 
 		self._last_read_temp = None
 		self._last_read_time = time.monotonic() - TEMP_REFRESH_TIMEOUT
+		self.truncated = truncated 				## Read only the temperature bytes of the scratchpad
+		self.full_read_every = full_read_every 	## 0 disables the periodic full reads in truncated mode
+		self._truncated_count = 0 				## Truncated reads since the last full read
 
 
 	@property
@@ -98,8 +105,7 @@ class DS18X20:
 	def temperature(self):
 		"""The temperature in degrees Celsius."""
 		if self._last_read_temp is None or (time.monotonic() - self._last_read_time) >= TEMP_REFRESH_TIMEOUT:
-			assert(self._convert_temp())
-			self._last_read_temp = self._read_temp()
+			self.refresh()
 			# self._last_read_time = time.monotonic()
 		return self._last_read_temp
 	
@@ -158,7 +164,7 @@ class DS18X20:
 
 
 
-	def _read_temp(self):
+	def _read_temp(self, truncated=None):
 		"""
 		buf = self._read_scratch()
 		if self._address.family_code == 0x10:
@@ -174,7 +180,12 @@ class DS18X20:
 		return t / 16
 		"""
 
-		assert(self._read_scratch())
+		if truncated is None:
+			truncated = self.truncated
+		if truncated and self.full_read_every and self._truncated_count >= self.full_read_every - 1:
+			truncated = False 		## Periodic full read so scratchpad corruption still gets caught
+		assert(self._read_scratch(TEMP_RD_SIZE if truncated else SCRATCH_RD_SIZE))
+		self._truncated_count = self._truncated_count + 1 if truncated else 0
 		"""
 		t_lo = self._device.read(const.bram_registers['RD_DATA0'])
 		t_hi = self._device.read(const.bram_registers['RD_DATA1'])
@@ -186,15 +197,18 @@ class DS18X20:
 
 
 
-	def _read_scratch(self):
+	def _read_scratch(self, size=SCRATCH_RD_SIZE):
 		"""
 		READ SCRATCHPAD [BEh]
 		This command allows the master to read the contents of the scratchpad register.
 		Note: master must generate read time slots immediately after issuing the command.
+
+		Reading fewer than `SCRATCH_RD_SIZE` bits (e.g. `TEMP_RD_SIZE`) ends the read early with a
+		reset pulse; only a full read includes the scratchpad CRC byte, which is then verified.
 		"""
 		with self._device as dev: 		## Automatically invokes `OneWireBus.reset()` and `OneWireBus.match_rom(self._address)`
 			dev.write_command(eeprom_commands['SCRATCH_RD'])
-			dev.write(const.bram_registers['RD_SIZE'], SCRATCH_RD_SIZE)
+			dev.write(const.bram_registers['RD_SIZE'], size)
 			dev.write_control(const.bus_commands['RD_TIME_SLOTS'])
 			count = 0
 			while dev.status & const.bitmasks['STA_RDD'] == 0:
@@ -204,6 +218,22 @@ class DS18X20:
 					return False
 				# timeout()
 				time.sleep(RW_TIME)
+
+			if size < SCRATCH_RD_SIZE:
+				dev.reset() 		## Master may terminate the read with a reset at any time
+				return True
+
+			scratch = (dev.read(const.bram_registers['RD_DATA0'])
+					| dev.read(const.bram_registers['RD_DATA1']) << 32
+					| (dev.read(const.bram_registers['RD_DATA2']) & 0xFF) << 64).to_bytes(9, 'little')
+			if scratch[5] != 0xFF:
+				## Reserved byte always reads FFh; this also catches an all-zero read (bus held low),
+				## which would otherwise pass the CRC check
+				print(f'Scratchpad Read Error (reserved byte): {scratch.hex()}')
+				return False
+			if crc8(scratch[:8]) != scratch[8]:
+				print(f'Scratchpad CRC Error: {scratch.hex()}')
+				return False
 		return True
 
 
@@ -212,8 +242,22 @@ class DS18X20:
 		return False 
 
 
-	def read_temperature(self):
+	def refresh(self, truncated=None):
+		"""Start a temperature conversion and read back the result, ignoring `TEMP_REFRESH_TIMEOUT`.
+		`truncated` overrides the sensor's scratchpad read mode for this read (e.g. per sweep).
+		Returns the new temperature in degrees Celsius."""
+		assert(self._convert_temp())
+		self._last_read_temp = self._read_temp(truncated)
+		return self._last_read_temp
+
+
+	def read_temperature(self, truncated=None):
 		"""Read the temperature. No polling of the conversion busy bit
 		(assumes that the conversion has completed)."""
-		return self._read_temp()
+		return self._read_temp(truncated)
+
+###################################################################################################
 
+## Let `OneWireBus.get_device()` dispatch DS18B20/DS18S20 ROMs to this driver
+OneWireBus.register_driver(DS18B20_FAMILY_CODE, DS18X20)
+OneWireBus.register_driver(DS18S20_FAMILY_CODE, DS18X20)
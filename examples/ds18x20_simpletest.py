@@ -8,6 +8,7 @@ import time
 try:
 	from onewire.bus import OneWireBus
 	from ds18x20 import DS18X20
+	from sinks import CSVSink
 
 except (ImportError, ModuleNotFoundError):
 	import os, sys
@@ -24,15 +25,20 @@ except (ImportError, ModuleNotFoundError):
 
 	from onewire.bus import OneWireBus
 	from ds18x20 import DS18X20
+	from sinks import CSVSink
 
 LOOP_DELAY = 5  ## Seconds
+LOG_PATH = 'ds18x20_readings.csv'  ## Readings are buffered and appended here in batches
 
 ## Initialize 1-Wire bus
 ow_bus = OneWireBus.get_instance()
 
 ## Scan for sensors and grab the first one found
 # ds18 = DS18X20(ow_bus, ow_bus.search()[0])
-sensors = [DS18X20(ow_bus, address) for address in ow_bus.search()]
+## (importing `ds18x20` registers DS18X20 as the bus driver for DS18B20/DS18S20 family codes)
+sensors = [ow_bus.get_device(address) for address in ow_bus.search()]
+
+log = CSVSink(LOG_PATH)
 
 ## Main loop to print the temperature every second
 while True:
@@ -40,8 +46,11 @@ while True:
 		for index, sensor in enumerate(sensors):
 			#print("Temperature: {0:0.3f}C".format(ds18.temperature))
 			print(f"[{index}]  DS18X20_{hex(sensor.rom_id)}:\tTemperature = {sensor.temperature} °C")
+			log.record(sensor)
 			time.sleep(0.1)
 		print('\n')
 		time.sleep(LOOP_DELAY)
 	except KeyboardInterrupt:
 		break
+
+log.close() 	## Writes out any readings still buffered
@@ -12,6 +12,18 @@ def timeout(ticks=256):		## timeout for 256 ticks == ~0.01 second delay
 			pass
 	return
 
+def crc8(data):
+	"""Dallas/Maxim 1-Wire CRC-8 (polynomial X^8 + X^5 + X^4 + 1) over an iterable of bytes."""
+	crc = 0
+	for byte in data:
+		for _ in range(8):
+			mix = (crc ^ byte) & 0x01
+			crc >>= 1
+			if mix:
+				crc ^= 0x8C
+			byte >>= 1
+	return crc
+
 ###################################################################################################
 
 class OneWireError(Exception):
@@ -20,10 +32,37 @@ class OneWireError(Exception):
 ###################################################################################################
 
 class OneWireAddress:
-	"""A class to represent a 1-Wire address."""
+	"""An immutable, hashable 1-Wire address.
+
+	The hi/lo 32 bit words are cached at construction (they are written out on every MATCH ROM),
+	and the ROM's CRC byte is checked so a corrupted address raises `OneWireError` up front.
+	"""
+
+	__slots__ = ('_rom', '_rom_hi', '_rom_lo')
+
+	def __init__(self, rom, validate=True):
+		rom = int(rom)
+		if not 0 <= rom < (1 << 64):
+			raise OneWireError(f"ROM code {hex(rom)} is not a 64 bit value")
+		if validate:
+			if rom == 0:
+				raise OneWireError("All-zero ROM code (bus held low?)")		## Passes the CRC, so check explicitly
+			if crc8(rom.to_bytes(8, 'little')[:7]) != rom >> 56:
+				raise OneWireError(f"CRC mismatch for ROM code {hex(rom)}")
+		object.__setattr__(self, '_rom', rom)		## Example:  0x5f0000060719f528
+		object.__setattr__(self, '_rom_hi', rom >> 32)
+		object.__setattr__(self, '_rom_lo', rom & 0xFFFFFFFF)
+
+	def __setattr__(self, name, value):
+		raise AttributeError(f"'{self.__class__.__name__}' object is immutable")
 
-	def __init__(self, rom):
-		self._rom = rom		## Example:  0x5f0000060719f528
+	def __delattr__(self, name):
+		raise AttributeError(f"'{self.__class__.__name__}' object is immutable")
+
+	def __reduce__(self):
+		## Rebuild through __init__, since __setattr__ blocks the default copy/pickle protocol.
+		## The ROM was already checked when this address was built, so skip validation.
+		return (self.__class__, (self._rom, False))
 
 	@property
 	def rom(self):
@@ -32,11 +71,11 @@ class OneWireAddress:
 
 	@property
 	def rom_hi(self):
-		return self._rom >> 32
+		return self._rom_hi
 
 	@property
 	def rom_lo(self):
-		return self._rom & 0xFFFFFFFF
+		return self._rom_lo
 
 	@property
 	def crc(self):
@@ -60,6 +99,17 @@ class OneWireAddress:
 	def __str__(self):
 		return f"OneWireAddress_{hex(self.rom)}"
 
+	def __repr__(self):
+		return f"OneWireAddress({hex(self.rom)})"
+
+	def __eq__(self, other):
+		if not isinstance(other, OneWireAddress):
+			return NotImplemented
+		return self._rom == other._rom
+
+	def __hash__(self):
+		return hash(self._rom)
+
 	def equals(self, other):
 		return isinstance(other, OneWireAddress) and self.rom == other.rom 
 
@@ -73,6 +123,8 @@ class OneWireBus:
 	# ##                               #  ^ Skipping the re-download will break 1-Wire search
 	
 	ROMAD_SIZE = 20 	## Large enough to hold 10 temp. sensor ROM IDs
+
+	DRIVERS = {} 	## Maps family code -> device driver class (see `register_driver()`)
 	
 	__instance = None 
 	__bus_initialized = False 
@@ -94,7 +146,8 @@ class OneWireBus:
 			self.axi_addr = base_addr
 			self.axi_range = addr_range 
 			self.bram = MMIO(base_addr, addr_range)
-			self.device_addresses = [None]
+			self.device_addresses = {} 	## Maps ROM code -> OneWireAddress, in order of discovery
+			self.devices = {} 	## Maps OneWireAddress -> device object (see `get_device()`)
 
 			OneWireBus.num_roms = 0
 			OneWireBus.set_clk()		## Set the PL function clock tied to the ow_master IP to 33 MHz
@@ -114,6 +167,36 @@ class OneWireBus:
 	def initialized():
 		return OneWire.__bus_initialized
 
+## ---------------------------------------------------------------------------------------------
+
+	@staticmethod
+	def register_driver(family_code, driver_class):
+		"""Register `driver_class(bus, address)` as the driver for devices with the given family code."""
+		OneWireBus.DRIVERS[family_code] = driver_class
+
+
+	def get_device(self, address):
+		"""
+		Returns the device object registered for `address` (a OneWireAddress or 64 bit ROM code),
+		creating it on first access with the driver registered for its family code
+		(falls back to a plain `OneWireDevice` if no driver is registered).
+		"""
+		if not isinstance(address, OneWireAddress):
+			address = self.device_addresses.get(address) or OneWireAddress(address)
+		device = self.devices.get(address)
+		if device is None:
+			driver_class = OneWireBus.DRIVERS.get(address.family_code)
+			if driver_class is None:
+				from .device import OneWireDevice
+				driver_class = OneWireDevice
+			device = self.devices[address] = driver_class(self, address)
+		return device
+
+
+	def get_devices(self):
+		"""Returns device objects for every ROM discovered by `search()`."""
+		return [self.get_device(address) for address in self.device_addresses.values()]
+
 ## ---------------------------------------------------------------------------------------------
 
 	@staticmethod
@@ -233,46 +316,28 @@ class OneWireBus:
 		self.num_roms = self.read_num_found_roms()
 		print(f'# ROMS FOUND = {self.num_roms}')
 
-		# new_size = self.num_roms * 2
-		# if new_size > self.ROMAD_SIZE:
-		# 	self.ROMAD_SIZE = new_size
-		# self.device_addresses = [0] * self.ROMAD_SIZE 
-		# self.device_addresses = [None] * self.num_roms
-		if self.num_roms > len(self.device_addresses):
-			self.device_addresses.extend([None] * (self.num_roms - len(self.device_addresses)))
-
 		for i in range(self.num_roms):
 			rom_lo = self.read((const.bram_registers['ROM_ID0'] + (i << 3)))
 			rom_hi = self.read((const.bram_registers['ROM_ID1'] + (i << 3)))
 			rom_long = (rom_hi << 32) + rom_lo
 			print(f"\nROM {i} ID: {hex(rom_long)}")
 
-			# self.device_addresses[i * 2] = rom_lo
-			# self.device_addresses[(i * 2) + 1] = rom_hi
-			# new_device = SensorClass(rom_hi, rom_lo, onewire_index=index)
-			# yield new_device
-
-			discovered_new_rom = True
-			# if self.device_addresses[i] is not None and self.device_addresses[i].rom == rom_long:
-			for device in self.device_addresses:
-				if device is not None and device.rom == rom_long:
-					## Device has already been discovered on bus
-					print(f"[OneWireBus.search]\tRe-discovered ROM:  {hex(rom_long)}")
-					discovered_new_rom = False
-					break 
-			
-			if discovered_new_rom:
+			if rom_long in self.device_addresses:
+				## Device has already been discovered on bus
+				print(f"[OneWireBus.search]\tRe-discovered ROM:  {hex(rom_long)}")
+				continue
+
+			try:
 				new_device = OneWireAddress(rom_long)
-				print(f"[OneWireBus.search]\tDiscovered new device ROM on bus:  {new_device}")
-				j = i 
-				while j < len(self.device_addresses) and self.device_addresses[j] is not None:
-					j += 1
-				self.device_addresses[j%len(self.device_addresses)] = new_device 
+			except OneWireError as e:
+				print(f"[OneWireBus.search]\tDiscarding corrupted ROM:  {e}")
+				continue
+			print(f"[OneWireBus.search]\tDiscovered new device ROM on bus:  {new_device}")
+			self.device_addresses[rom_long] = new_device 
 
 		OneWireBus.search_complete = True 		## Unlock the 1-Wire bus after search is completed
 
-		# return list(self.device_addresses)
-		return [addr for addr in self.device_addresses if addr is not None]		
+		return list(self.device_addresses.values())
 
 
 	def match_rom(self, address):
@@ -0,0 +1,174 @@
+## Change-driven adaptive polling for DS18X20 sensors.
+##
+## Instead of refreshing every sensor on the same fixed `TEMP_REFRESH_TIMEOUT`, each sensor gets its
+## own poll interval derived from its observed rate of change: stable sensors back off towards
+## `max_interval`, moving sensors are polled more often (down to `min_interval`). A change event is
+## only emitted when a reading has moved at least `deadband` degrees from the last reported value.
+
+import time
+import threading
+
+###################################################################################################
+
+DEFAULT_MIN_INTERVAL = 1.0 		## Seconds; fastest a single sensor will be polled
+DEFAULT_MAX_INTERVAL = 300.0 	## Seconds; ceiling for sensors that are not changing
+DEFAULT_DEADBAND = 0.25 		## Degrees Celsius a reading must move before an event is emitted
+DEFAULT_SMOOTHING = 0.3 		## Weight of the newest sample in the rate-of-change moving average
+DEFAULT_GROWTH = 1.5 			## Factor a stable sensor's interval grows by per poll
+DEFAULT_STEPS_PER_DEADBAND = 2 	## Aim to poll this many times while a sensor drifts one deadband
+
+###################################################################################################
+
+class SensorSchedule:
+	"""Polling state for a single sensor."""
+
+	__slots__ = ('sensor', 'deadband', 'interval', 'next_poll', 'rate',
+				'last_value', 'last_time', 'reported_value')
+
+	def __init__(self, sensor, deadband, interval):
+		self.sensor = sensor
+		self.deadband = deadband
+		self.interval = interval
+		self.next_poll = float('-inf') 		## Due on the first poll, whatever clock drives `poll()`
+		self.rate = 0.0 				## Smoothed rate of change, degrees per second
+		self.last_value = None
+		self.last_time = None
+		self.reported_value = None 		## Value of the last emitted change event
+
+	@property
+	def rom_id(self):
+		return self.sensor.rom_id
+
+###################################################################################################
+
+class AdaptivePoller:
+	"""
+	Schedules sensor reads based on each sensor's rate of change.
+
+	`on_change(sensor, value, previous)` is called (and the reading written to each of `sinks`) only
+	when a sensor's reading crosses its deadband relative to the last reported value; `previous` is
+	None for a sensor's first reading.
+
+	`truncated` is passed to each sensor's `refresh()` to pick the scratchpad read mode for every
+	poll; None leaves it to each sensor's own setting.
+	"""
+
+	def __init__(self, sensors=(), min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+				deadband=DEFAULT_DEADBAND, smoothing=DEFAULT_SMOOTHING, growth=DEFAULT_GROWTH,
+				on_change=None, sinks=(), truncated=None):
+		if not 0 < min_interval <= max_interval:
+			raise ValueError("Poll intervals must satisfy 0 < min_interval <= max_interval.")
+		self.min_interval = min_interval
+		self.max_interval = max_interval
+		self.deadband = deadband
+		self.smoothing = smoothing
+		self.growth = growth
+		self.on_change = on_change
+		self.sinks = list(sinks)
+		self.truncated = truncated
+		self.schedules = {} 	## Maps ROM code -> SensorSchedule
+		self._stop = threading.Event()
+		for sensor in sensors:
+			self.add(sensor)
+
+
+	def add(self, sensor, deadband=None):
+		"""Start polling `sensor`, optionally with its own deadband (degrees Celsius)."""
+		schedule = SensorSchedule(sensor, self.deadband if deadband is None else deadband, self.min_interval)
+		self.schedules[sensor.rom_id] = schedule
+		return schedule
+
+
+	def remove(self, sensor):
+		self.schedules.pop(sensor.rom_id, None)
+
+
+	def set_deadband(self, sensor, deadband):
+		self.schedules[sensor.rom_id].deadband = deadband
+
+
+	def next_due(self, now=None):
+		"""Seconds until the next sensor is due to be polled (0 if one is overdue)."""
+		if not self.schedules:
+			return self.max_interval
+		if now is None:
+			now = time.monotonic()
+		return max(0.0, min(s.next_poll for s in self.schedules.values()) - now)
+
+
+	def poll(self, now=None):
+		"""
+		Read every sensor that is due, update its poll interval and return a list of
+		`(timestamp, rom, value, previous)` change events for readings that crossed their deadband.
+
+		If `now` is given it is used as the monotonic time for both the due check and rescheduling,
+		so the schedule can be driven deterministically. Otherwise the time of each read is used.
+		"""
+		fixed_clock = now is not None
+		if not fixed_clock:
+			now = time.monotonic()
+		events = []
+		try:
+			for schedule in list(self.schedules.values()):
+				if schedule.next_poll > now:
+					continue
+				try:
+					value = self._read(schedule.sensor)
+				except Exception as e:
+					## A failed read (e.g. unplugged sensor or CRC error) must not stall the other sensors
+					print(f"[AdaptivePoller.poll]  Failed to read sensor {hex(schedule.rom_id)}: {e!r}")
+					schedule.next_poll = (now if fixed_clock else time.monotonic()) + self.min_interval
+					continue
+				read_time = now if fixed_clock else time.monotonic()
+				self._update_interval(schedule, value, read_time)
+				schedule.next_poll = read_time + schedule.interval
+
+				previous = schedule.reported_value
+				if previous is None or abs(value - previous) >= schedule.deadband:
+					schedule.reported_value = value
+					events.append((time.time(), schedule.rom_id, value, previous))
+					if self.on_change is not None:
+						self.on_change(schedule.sensor, value, previous)
+		finally:
+			## Persist whatever was reported before anything went wrong
+			if events:
+				readings = [(ts, rom, value) for ts, rom, value, _ in events]
+				for sink in self.sinks:
+					sink.write_many(readings)
+		return events
+
+
+	def run(self):
+		"""Poll sensors as they come due until `stop()` is called."""
+		self._stop.clear()
+		while not self._stop.is_set():
+			self.poll()
+			self._stop.wait(self.next_due())
+
+
+	def stop(self):
+		self._stop.set()
+
+
+	def _read(self, sensor):
+		## Bypass DS18X20's fixed refresh timeout; the poller decides when a sensor is stale
+		refresh = getattr(sensor, 'refresh', None)
+		return refresh(self.truncated) if refresh is not None else sensor.temperature
+
+
+	def _update_interval(self, schedule, value, read_time):
+		if schedule.last_value is not None:
+			elapsed = read_time - schedule.last_time
+			if elapsed > 0:
+				rate = abs(value - schedule.last_value) / elapsed
+				schedule.rate += self.smoothing * (rate - schedule.rate)
+
+		## Stable sensors back off gradually; moving sensors drop straight to the interval in which
+		## they are expected to drift a fraction of their deadband
+		interval = schedule.interval * self.growth
+		if schedule.rate > 0:
+			interval = min(interval, schedule.deadband / (schedule.rate * DEFAULT_STEPS_PER_DEADBAND))
+		schedule.interval = min(self.max_interval, max(self.min_interval, interval))
+
+		schedule.last_value = value
+		schedule.last_time = read_time
@@ -0,0 +1,321 @@
+## Buffered output sinks for persisting DS18X20 readings.
+##
+## Readings are queued in memory and written out in batches, either once `batch_size` readings
+## have accumulated or once `flush_interval` seconds have passed (checked by a background thread),
+## so the storage medium sees one write per batch rather than one write + flush per sample.
+
+import io
+import os
+import csv
+import time
+import array
+import sqlite3
+import threading
+
+###################################################################################################
+
+DEFAULT_BATCH_SIZE = 256 		## Readings buffered before a size-triggered flush
+DEFAULT_FLUSH_INTERVAL = 60 	## Seconds between time-triggered flushes
+DEFAULT_MAX_BYTES = 16 << 20 	## Rotate output files once they grow past 16 MiB (0 disables rotation)
+DEFAULT_BACKUP_COUNT = 5 		## Number of rotated files kept around
+
+## Column typecodes for `BinaryColumnSink`, one append-only file per column
+BINARY_COLUMNS = (
+		('time', 'd'),  ## UNIX timestamp, float64
+		('rom' , 'Q'),  ## 64 bit ROM code, uint64
+		('temp', 'f'),  ## Temperature in degrees Celsius, float32
+)
+
+###################################################################################################
+
+def rotate_file(path, backup_count=DEFAULT_BACKUP_COUNT):
+	"""Shift `path` -> `path.1` -> `path.2` ..., dropping anything past `backup_count`."""
+	if not os.path.exists(path):
+		return
+	if backup_count <= 0:
+		os.remove(path)
+		return
+	for i in range(backup_count - 1, 0, -1):
+		src = f"{path}.{i}"
+		if os.path.exists(src):
+			os.replace(src, f"{path}.{i + 1}")
+	os.replace(path, f"{path}.1")
+
+
+def append_all(pairs):
+	"""
+	Append each `(file, data)` pair to its unbuffered binary file as one all-or-nothing batch:
+	if any write fails, every file is truncated back to its length before the call.
+	"""
+	offsets = [f.seek(0, os.SEEK_END) for f, _ in pairs]
+	try:
+		for f, data in pairs:
+			view = memoryview(data)
+			while view:
+				view = view[f.write(view) or 0:]
+	except BaseException:
+		for (f, _), offset in zip(pairs, offsets):
+			f.truncate(offset)
+		raise
+
+
+def check_reading(reading):
+	"""Coerce a reading to `(float timestamp, int rom, float temperature)`, raising ValueError if it can't be."""
+	try:
+		timestamp, rom, temperature = reading
+		reading = (float(timestamp), int(rom), float(temperature))
+	except (TypeError, ValueError) as e:
+		raise ValueError(f"Invalid reading {reading!r}: {e}") from None
+	if not 0 <= reading[1] < (1 << 64):
+		raise ValueError(f"Invalid reading {reading!r}: ROM code is not a 64 bit value")
+	return reading
+
+
+def sweep(sensors, *sinks, truncated=None):
+	"""Read every sensor once and hand each (timestamp, rom, temperature) reading to all sinks.
+	Returns the list of readings taken.
+
+	By default `sensor.temperature` is used, which may return a value cached for up to
+	`TEMP_REFRESH_TIMEOUT`. Passing `truncated` (True or False) instead forces a fresh conversion
+	and read of every sensor via `refresh(truncated)` with that scratchpad read mode, bypassing the
+	cache; sensors without a `refresh()` method still fall back to `.temperature`.
+	"""
+	readings = []
+	for sensor in sensors:
+		refresh = getattr(sensor, 'refresh', None)
+		if truncated is None or refresh is None:
+			temperature = sensor.temperature
+		else:
+			temperature = refresh(truncated)
+		readings.append((time.time(), sensor.rom_id, temperature))
+	for sink in sinks:
+		sink.write_many(readings)
+	return readings
+
+###################################################################################################
+
+class ReadingSink:
+	"""Base class for a buffered, batched sink of (timestamp, rom, temperature) readings.
+
+	Subclasses implement `_write_batch(readings)`, which must write all of the readings or none of
+	them, and may override `_open()`, `_close()` and `_size()` to take part in file rotation.
+	"""
+
+	def __init__(self, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+				max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT):
+		self.batch_size = max(1, batch_size)
+		self.flush_interval = flush_interval
+		self.max_bytes = max_bytes
+		self.backup_count = backup_count
+		self._buffer = []
+		self._lock = threading.RLock()
+		self._closed = False
+		self._stop = threading.Event()
+		self._thread = None
+		self._open()
+		if flush_interval:
+			self._thread = threading.Thread(target=self._flush_loop, name=f"{self.__class__.__name__}-flush", daemon=True)
+			self._thread.start()
+
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+		return False
+
+
+	def write(self, rom, temperature, timestamp=None):
+		"""Queue a single reading. Flushes if the buffer has reached `batch_size`."""
+		if timestamp is None:
+			timestamp = time.time()
+		self.write_many(((timestamp, rom, temperature),))
+
+
+	def write_many(self, readings):
+		"""Queue an iterable of (timestamp, rom, temperature) readings.
+		Raises ValueError (queuing none of them) if any reading is malformed."""
+		readings = [check_reading(r) for r in readings]
+		with self._lock:
+			if self._closed:
+				raise ValueError(f"[{self.__class__.__name__}.write]  Sink is closed")
+			self._buffer.extend(readings)
+			if len(self._buffer) >= self.batch_size:
+				self.flush()
+
+
+	def record(self, sensor):
+		"""Read `sensor.temperature` and queue it against the sensor's ROM."""
+		self.write(sensor.rom_id, sensor.temperature)
+
+
+	def flush(self):
+		"""Write all buffered readings out as one batch, rotating the output first if needed.
+		`_write_batch()` is all-or-nothing, and the buffer is only cleared once it succeeds, so a
+		failed flush is retried in full without duplicating rows."""
+		with self._lock:
+			if not self._buffer:
+				return
+			if self.max_bytes and self._size() >= self.max_bytes:
+				self._rotate()
+			self._write_batch(self._buffer)
+			self._buffer = []
+
+
+	def close(self):
+		"""Stop the flush thread, write out anything still buffered and release the output."""
+		self._stop.set()
+		if self._thread is not None and self._thread is not threading.current_thread():
+			self._thread.join()
+		with self._lock:
+			if self._closed:
+				return
+			try:
+				self.flush()
+			finally:
+				self._close() 		## Release the output even if the final flush failed
+				self._closed = True
+
+
+	def _flush_loop(self):
+		while not self._stop.wait(self.flush_interval):
+			try:
+				self.flush()
+			except Exception as e:
+				print(f"[{self.__class__.__name__}._flush_loop]  Flush failed: {e}")
+
+
+	def _rotate(self):
+		self._close()
+		try:
+			for path in self._paths():
+				rotate_file(path, self.backup_count)
+		finally:
+			self._open() 		## Keep the sink writable even if a rename failed
+
+
+	def _paths(self):
+		return ()
+
+	def _size(self):
+		return sum(os.path.getsize(p) for p in self._paths() if os.path.exists(p))
+
+	def _open(self):
+		pass
+
+	def _close(self):
+		pass
+
+	def _write_batch(self, readings):
+		raise NotImplementedError
+
+###################################################################################################
+
+class CSVSink(ReadingSink):
+	"""Appends readings as `time,rom,temperature` rows to a CSV file."""
+
+	HEADER = ('time', 'rom', 'temperature')
+
+	def __init__(self, path, **kwargs):
+		self.path = path
+		self._file = None
+		super().__init__(**kwargs)
+
+	def _paths(self):
+		return (self.path,)
+
+	def _open(self):
+		## Unbuffered, so a failed write can be rolled back without stale data left in a buffer
+		self._file = open(self.path, 'ab', buffering=0)
+		if self._file.seek(0, os.SEEK_END) == 0:
+			append_all([(self._file, self._format((self.HEADER,)))])
+
+	def _close(self):
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+
+	def _format(self, rows):
+		text = io.StringIO()
+		csv.writer(text).writerows(rows)
+		return text.getvalue().encode()
+
+	def _write_batch(self, readings):
+		## Format the whole batch up front so it goes out in a single write
+		append_all([(self._file, self._format((f"{ts:.3f}", hex(rom), temp) for ts, rom, temp in readings))])
+
+###################################################################################################
+
+class SQLiteSink(ReadingSink):
+	"""Inserts readings into an SQLite table, one `executemany` transaction per batch."""
+
+	def __init__(self, path, table='readings', **kwargs):
+		self.path = path
+		self.table = table
+		self._conn = None
+		super().__init__(**kwargs)
+
+	def _paths(self):
+		return (self.path,)
+
+	def _open(self):
+		## The connection is shared with the background flush thread; `self._lock` serializes access
+		self._conn = sqlite3.connect(self.path, check_same_thread=False)
+		self._conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (time REAL, rom INTEGER, temperature REAL)")
+		self._conn.commit()
+
+	def _close(self):
+		if self._conn is not None:
+			self._conn.close()
+			self._conn = None
+
+	def _write_batch(self, readings):
+		## SQLite integers are signed 64 bit, so ROM codes are stored in two's complement form
+		rows = [(ts, rom - (1 << 64) if rom >= (1 << 63) else rom, temp) for ts, rom, temp in readings]
+		with self._conn:
+			self._conn.executemany(f"INSERT INTO {self.table} VALUES (?, ?, ?)", rows)
+
+###################################################################################################
+
+class BinaryColumnSink(ReadingSink):
+	"""Appends readings to one fixed-width, native-endian binary file per column
+	(`<path>.time`, `<path>.rom`, `<path>.temp`; see `BINARY_COLUMNS`).
+
+	Each column file can be loaded back with `array.array(typecode).fromfile()` or `numpy.fromfile()`.
+	"""
+
+	def __init__(self, path, **kwargs):
+		self.path = path
+		self._files = {}
+		super().__init__(**kwargs)
+
+	def _paths(self):
+		return tuple(f"{self.path}.{name}" for name, _ in BINARY_COLUMNS)
+
+	def _open(self):
+		self._files = {name: open(f"{self.path}.{name}", 'ab', buffering=0) for name, _ in BINARY_COLUMNS}
+
+	def _close(self):
+		for f in self._files.values():
+			f.close()
+		self._files = {}
+
+	def _write_batch(self, readings):
+		## Build every column first, then append them together so the files always stay row-aligned
+		columns = [array.array(typecode, (r[i] for r in readings)) for i, (_, typecode) in enumerate(BINARY_COLUMNS)]
+		append_all([(self._files[name], col.tobytes()) for (name, _), col in zip(BINARY_COLUMNS, columns)])
+
+
+def read_binary_columns(path):
+	"""Load the columns written by a `BinaryColumnSink` back into a dict of arrays.
+	Columns are trimmed to the shortest one, dropping any row left incomplete (e.g. by a crash mid-write)."""
+	columns = {}
+	for name, typecode in BINARY_COLUMNS:
+		col = array.array(typecode)
+		with open(f"{path}.{name}", 'rb') as f:
+			data = f.read()
+		col.frombytes(data[:len(data) - len(data) % col.itemsize])
+		columns[name] = col
+	rows = min(len(col) for col in columns.values())
+	return {name: col[:rows] for name, col in columns.items()}
@@ -0,0 +1,6 @@
+import os, sys
+
+## The driver modules live at the repo root rather than in an installed package
+rootpath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not rootpath in sys.path:
+	sys.path.insert(0, rootpath)
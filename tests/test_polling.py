@@ -0,0 +1,104 @@
+import pytest
+
+import polling
+
+
+class FakeSensor:
+	"""Returns queued readings from `refresh()`; raises once the queue is empty if `fail` is set."""
+
+	def __init__(self, rom_id, values, fail=False):
+		self.rom_id = rom_id
+		self.values = list(values)
+		self.fail = fail
+		self.reads = 0
+
+	def refresh(self, truncated=None):
+		self.reads += 1
+		assert not self.fail, 'Scratchpad Read Error'
+		return self.values.pop(0) if len(self.values) > 1 else self.values[0]
+
+
+class ListSink:
+	def __init__(self):
+		self.readings = []
+
+	def write_many(self, readings):
+		self.readings.extend(readings)
+
+
+def make_poller(*sensors, **kwargs):
+	kwargs.setdefault('min_interval', 1)
+	kwargs.setdefault('max_interval', 16)
+	kwargs.setdefault('deadband', 0.5)
+	kwargs.setdefault('smoothing', 1.0)
+	kwargs.setdefault('growth', 2)
+	return polling.AdaptivePoller(sensors, **kwargs)
+
+###################################################################################################
+
+def test_stable_sensor_backs_off_to_ceiling():
+	sensor = FakeSensor(0x1, [20.0])
+	poller = make_poller(sensor)
+	next_polls = []
+	now = 0
+	for _ in range(6):
+		poller.poll(now=now)
+		now = poller.schedules[0x1].next_poll
+		next_polls.append(now)
+	assert next_polls == [2, 6, 14, 30, 46, 62]
+	assert sensor.reads == 6
+
+
+def test_sensor_not_read_before_due():
+	sensor = FakeSensor(0x1, [20.0])
+	poller = make_poller(sensor)
+	poller.poll(now=0)
+	poller.poll(now=1.5)
+	assert sensor.reads == 1
+	assert poller.next_due(now=1.5) == 0.5
+
+
+def test_moving_sensor_polls_faster():
+	sensor = FakeSensor(0x1, [20.0, 20.0, 22.0])
+	poller = make_poller(sensor)
+	poller.poll(now=0)
+	poller.poll(now=2)
+	assert poller.schedules[0x1].next_poll == 6
+	poller.poll(now=6) 		## 2 degrees in 4 s: 0.5 °C/s -> 0.5 s interval, clamped to min_interval
+	assert poller.schedules[0x1].next_poll == 7
+
+
+def test_events_only_on_deadband_crossing():
+	sensor = FakeSensor(0x1, [20.0, 20.2, 20.4, 20.6, 20.7])
+	sink = ListSink()
+	changes = []
+	poller = make_poller(sensor, max_interval=1, sinks=[sink],
+			on_change=lambda s, value, previous: changes.append((value, previous)))
+	events = [poller.poll(now=t) for t in range(5)]
+	assert [len(e) for e in events] == [1, 0, 0, 1, 0]
+	assert changes == [(20.0, None), (20.6, 20.0)]
+	assert [(rom, value) for _, rom, value in sink.readings] == [(0x1, 20.0), (0x1, 20.6)]
+
+
+def test_failing_sensor_does_not_stop_sweep(capsys):
+	good = FakeSensor(0x1, [20.0])
+	bad = FakeSensor(0x2, [0.0], fail=True)
+	after = FakeSensor(0x3, [21.0])
+	sink = ListSink()
+	poller = make_poller(good, bad, after, sinks=[sink])
+	events = poller.poll(now=10)
+	assert [rom for _, rom, _, _ in events] == [0x1, 0x3]
+	assert [rom for _, rom, _ in sink.readings] == [0x1, 0x3]
+	assert poller.schedules[0x2].next_poll == 11
+	assert 'Failed to read sensor 0x2' in capsys.readouterr().out
+
+
+def test_events_reach_sinks_when_callback_raises():
+	sink = ListSink()
+	def on_change(sensor, value, previous):
+		if sensor.rom_id == 0x2:
+			raise RuntimeError('callback failed')
+	poller = make_poller(FakeSensor(0x1, [20.0]), FakeSensor(0x2, [21.0]), sinks=[sink], on_change=on_change)
+	with pytest.raises(RuntimeError):
+		poller.poll(now=0)
+	assert [rom for _, rom, _ in sink.readings] == [0x1, 0x2]
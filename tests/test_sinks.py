@@ -0,0 +1,151 @@
+import csv
+import errno
+import os
+import sqlite3
+import time
+
+import pytest
+
+import sinks
+
+
+def read_csv(path):
+	with open(path, newline='') as f:
+		return list(csv.reader(f))[1:]
+
+
+class FailingFile:
+	"""Wraps an unbuffered file; the first write only gets `partial` bytes out before failing."""
+
+	def __init__(self, f, partial=0):
+		self._f = f
+		self._partial = partial
+		self.failed = False
+
+	def write(self, data):
+		if not self.failed:
+			self.failed = True
+			if self._partial:
+				self._f.write(data[:self._partial])
+			raise OSError(errno.ENOSPC, 'No space left on device')
+		return self._f.write(data)
+
+	def __getattr__(self, name):
+		return getattr(self._f, name)
+
+###################################################################################################
+
+def test_flush_by_size(tmp_path):
+	path = str(tmp_path / 'r.csv')
+	with sinks.CSVSink(path, batch_size=3, flush_interval=0) as sink:
+		sink.write(0x1, 20.0, timestamp=1)
+		sink.write(0x2, 21.0, timestamp=2)
+		assert read_csv(path) == []
+		sink.write(0x3, 22.0, timestamp=3)
+		assert read_csv(path) == [['1.000', '0x1', '20.0'], ['2.000', '0x2', '21.0'], ['3.000', '0x3', '22.0']]
+
+
+def test_flush_by_timer(tmp_path):
+	path = str(tmp_path / 'r.csv')
+	with sinks.CSVSink(path, flush_interval=0.02) as sink:
+		sink.write(0x1, 20.0, timestamp=1)
+		deadline = time.monotonic() + 2
+		while not read_csv(path) and time.monotonic() < deadline:
+			time.sleep(0.01)
+		assert read_csv(path) == [['1.000', '0x1', '20.0']]
+
+
+def test_rotation_keeps_backup_count(tmp_path):
+	path = str(tmp_path / 'r.csv')
+	with sinks.CSVSink(path, flush_interval=0, max_bytes=1, backup_count=2) as sink:
+		for i in range(4):
+			sink.write(i, 20.0, timestamp=i)
+			sink.flush()
+	assert sorted(os.listdir(tmp_path)) == ['r.csv', 'r.csv.1', 'r.csv.2']
+	assert read_csv(path) == [['3.000', '0x3', '20.0']]
+	assert read_csv(path + '.1') == [['2.000', '0x2', '20.0']]
+	assert read_csv(path + '.2') == [['1.000', '0x1', '20.0']]
+
+
+def test_sqlite_batch(tmp_path):
+	path = str(tmp_path / 'r.db')
+	with sinks.SQLiteSink(path, flush_interval=0) as sink:
+		sink.write_many([(1, 0x5f0000060719f528, 20.0), (2, 0x28, 21.0)])
+	rows = sqlite3.connect(path).execute('SELECT time, rom, temperature FROM readings').fetchall()
+	assert [(t, rom & 0xFFFFFFFFFFFFFFFF, c) for t, rom, c in rows] == [(1.0, 0x5f0000060719f528, 20.0), (2.0, 0x28, 21.0)]
+
+###################################################################################################
+
+def test_failed_csv_flush_is_retried_without_duplicates(tmp_path):
+	path = str(tmp_path / 'r.csv')
+	sink = sinks.CSVSink(path, flush_interval=0)
+	sink._file = FailingFile(sink._file, partial=20)
+	sink.write_many([(1, 0x1, 20.0), (2, 0x2, 21.0)])
+	with pytest.raises(OSError):
+		sink.flush()
+	assert read_csv(path) == []
+	sink.write(0x3, 22.0, timestamp=3)
+	sink.close()
+	assert read_csv(path) == [['1.000', '0x1', '20.0'], ['2.000', '0x2', '21.0'], ['3.000', '0x3', '22.0']]
+
+
+def test_failed_binary_flush_keeps_columns_aligned(tmp_path):
+	path = str(tmp_path / 'r')
+	sink = sinks.BinaryColumnSink(path, flush_interval=0)
+	sink._files['temp'] = FailingFile(sink._files['temp'])
+	sink.write_many([(1, 0x1, 10.0), (2, 0x2, 20.0)])
+	with pytest.raises(OSError):
+		sink.flush()
+	sink.write(0x3, 30.0, timestamp=3)
+	sink.close()
+	columns = sinks.read_binary_columns(path)
+	assert list(columns['time']) == [1, 2, 3]
+	assert list(columns['rom']) == [1, 2, 3]
+	assert list(columns['temp']) == [10, 20, 30]
+
+
+@pytest.mark.parametrize('reading', [(1, 0x1, None), (1, -1, 20.0), (1, 1 << 64, 20.0), (None, 0x1, 20.0), (1, 0x1)])
+def test_bad_readings_are_rejected(tmp_path, reading):
+	path = str(tmp_path / 'r')
+	with sinks.BinaryColumnSink(path, flush_interval=0) as sink:
+		with pytest.raises(ValueError):
+			sink.write_many([(0, 0x1, 1.0), reading])
+		sink.write(0x2, 2.0, timestamp=2)
+	assert list(sinks.read_binary_columns(path)['rom']) == [2]
+
+
+def test_close_releases_output_when_flush_fails(tmp_path):
+	sink = sinks.CSVSink(str(tmp_path / 'r.csv'), flush_interval=0)
+	sink._file = FailingFile(sink._file)
+	sink.write(0x1, 20.0)
+	with pytest.raises(OSError):
+		sink.close()
+	assert sink._file is None
+	sink.close() 		## Already closed; must not raise again
+
+###################################################################################################
+
+class CachedSensor:
+	rom_id = 0x1
+	temperature = 20.0
+
+
+class RefreshingSensor(CachedSensor):
+	def __init__(self):
+		self.modes = []
+
+	def refresh(self, truncated=None):
+		self.modes.append(truncated)
+		return 21.0
+
+
+def test_sweep_uses_cached_temperature_by_default():
+	sensor = RefreshingSensor()
+	assert [r[2] for r in sinks.sweep([sensor, CachedSensor()])] == [20.0, 20.0]
+	assert sensor.modes == []
+
+
+def test_sweep_with_read_mode_refreshes():
+	sensor = RefreshingSensor()
+	assert [r[2] for r in sinks.sweep([sensor, CachedSensor()], truncated=True)] == [21.0, 20.0]
+	assert sensor.modes == [True]